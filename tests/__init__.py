@@ -1,4 +1,7 @@
-"""Fix path for unittests."""
+"""Fix path and use a fresh cache for unittests."""
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+os.environ["WHATDIDYOUDO_CACHE_DIR"] = tempfile.mkdtemp(
+    prefix="whatdidyoudo-test-")
@@ -29,6 +29,12 @@ class WhatDidYouDoTestCase(unittest.TestCase):
         self.assertIn('rompe', html)
         self.assertIn('2024-09-29', html)
 
+    def test_invalid_date_route(self):
+        """Test that an invalid date shows an error instead of failing."""
+        response = self.app.get('/,/garbage')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Invalid date', response.get_data(as_text=True))
+
 
 if __name__ == '__main__':
     unittest.main()
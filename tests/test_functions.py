@@ -1,6 +1,13 @@
 """Unit tests for the some utility functions."""
+import datetime
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import requests
 import whatdidyoudo.app
+from whatdidyoudo.app import Changeset
 
 
 class WhatDidYouDoFunctionsTestCase(unittest.TestCase):
@@ -25,3 +32,240 @@ class WhatDidYouDoFunctionsTestCase(unittest.TestCase):
         self.assertEqual(change.changesets, 1)
         self.assertEqual(change.changes, 1)
         self.assertEqual(len(changeset_ids), 1)
+
+    def test_count_diff_changes(self) -> None:
+        """Test count_diff_changes."""
+        content = (b'<osmChange><create><node id="1"/><way id="2"/></create>'
+                   b'<modify><node id="3"><tag k="a" v="b"/></node></modify>'
+                   b'<delete/></osmChange>')
+        count_diff_changes = whatdidyoudo.app.count_diff_changes
+        self.assertEqual(count_diff_changes([content]), 3)
+        # Tags split across chunks must be counted once
+        for size in (1, 3, 7):
+            chunks = [content[i:i + size]
+                      for i in range(0, len(content), size)]
+            self.assertEqual(count_diff_changes(chunks), 3)
+
+    def test_parse_changesets(self) -> None:
+        """Test parse_changesets."""
+        content = (b'<osm><changeset id="1" created_at="2026-01-02T10:00:00Z"'
+                   b' closed_at="2026-01-02T11:00:00Z">'
+                   b'<tag k="comment" v="Test"/>'
+                   b'<tag k="created_by" v="StreetComplete 62.1"/>'
+                   b'</changeset><changeset id="2"'
+                   b' created_at="2026-01-02T09:00:00Z"/></osm>')
+        changesets = whatdidyoudo.app.parse_changesets([content[:50], content[50:]])
+        self.assertEqual(len(changesets), 2)
+        self.assertEqual(changesets[0].id, "1")
+        self.assertEqual(changesets[0].editor, "StreetComplete 62.1")
+        self.assertTrue(changesets[0].closed)
+        self.assertEqual(changesets[1].editor, "")
+        self.assertFalse(changesets[1].closed)
+
+        # Changesets without id or created_at are skipped
+        changesets = whatdidyoudo.app.parse_changesets(
+            [b'<osm><changeset created_at="2026-01-02T10:00:00Z"/>'
+             b'<changeset id="3"/></osm>'])
+        self.assertEqual(changesets, [])
+
+    def test_coalesce(self) -> None:
+        """Test that concurrent coalesce calls share one result."""
+        started = threading.Event()
+        release = threading.Event()
+        calls: list[int] = []
+
+        def work() -> int:
+            calls.append(1)
+            started.set()
+            release.wait(timeout=5)
+            return 42
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(whatdidyoudo.app.coalesce, "key", work)
+            started.wait(timeout=5)
+            second = executor.submit(whatdidyoudo.app.coalesce, "key", work)
+            time.sleep(0.1)
+            release.set()
+            self.assertEqual(first.result(), 42)
+            self.assertEqual(second.result(), 42)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(whatdidyoudo.app.coalesce("key", lambda: 1), 1)
+
+    def test_normalize_range(self) -> None:
+        """Test normalize_range."""
+        normalize_range = whatdidyoudo.app.normalize_range
+        self.assertEqual(normalize_range(None, None, "2026-01-02"),
+                         ("2026-01-02T00:00", "2026-01-02T23:59", False))
+        self.assertEqual(normalize_range("2026-01-01", "2026-01-02", "x"),
+                         ("2026-01-01T00:00", "2026-01-02T23:59", True))
+        self.assertEqual(normalize_range("2026-01-01T10:00", None, "x"),
+                         ("2026-01-01T10:00", "2026-01-01T10:00", False))
+        self.assertEqual(normalize_range("2026-1-5", None, "x"),
+                         ("2026-01-05T00:00", "2026-01-05T23:59", False))
+        with self.assertRaises(ValueError):
+            normalize_range("garbage", None, "x")
+
+    def test_token_bucket(self) -> None:
+        """Test that TokenBucket allows a burst and then limits the rate."""
+        bucket = whatdidyoudo.app.TokenBucket(rate=20, burst=2)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+
+class WhatDidYouDoCacheTestCase(unittest.TestCase):
+    """Unit tests for the caching decisions, with mocked OSM API calls."""
+    def setUp(self) -> None:
+        whatdidyoudo.app.cache.clear()
+
+    def test_count_changes_open_changeset(self) -> None:
+        """Test that counts of open changesets aren't used as final."""
+        open_cs = Changeset(id="7", editor="iD", closed=False,
+                            created_at="2026-01-02T10:00:00Z")
+        closed_cs = open_cs._replace(closed=True)
+        with mock.patch("whatdidyoudo.app.fetch_diff",
+                        return_value=(5, '"a"')) as fetch_diff:
+            changes, _, complete = whatdidyoudo.app.count_changes([open_cs])
+        self.assertEqual(changes["iD"].changes, 5)
+        self.assertTrue(complete)
+        fetch_diff.assert_called_once()
+
+        # The changeset got closed with more changes
+        with mock.patch("whatdidyoudo.app.fetch_diff",
+                        return_value=(20, '"b"')) as fetch_diff:
+            changes, _, _ = whatdidyoudo.app.count_changes([closed_cs])
+        self.assertEqual(changes["iD"].changes, 20)
+        fetch_diff.assert_called_once()
+        self.assertEqual(fetch_diff.call_args.args[1], '"a"')
+
+        # Now the cached count is final
+        with mock.patch("whatdidyoudo.app.fetch_diff") as fetch_diff:
+            changes, _, _ = whatdidyoudo.app.count_changes([closed_cs])
+        self.assertEqual(changes["iD"].changes, 20)
+        fetch_diff.assert_not_called()
+
+    def test_changeset_summaries_not_final(self) -> None:
+        """Test that lists cached before the range was over are revalidated."""
+        url = "https://example.com/changesets"
+        partial = [Changeset(id="1", editor="iD", closed=False,
+                             created_at="2026-01-02T10:00:00Z")]
+        complete = partial + [partial[0]._replace(id="2")]
+        with mock.patch("whatdidyoudo.app.fetch_changesets",
+                        return_value=(partial, '"a"')):
+            whatdidyoudo.app.get_changeset_summaries(url, cache_result=False)
+
+        # The range is over now, but the cached list isn't final
+        with mock.patch("whatdidyoudo.app.fetch_changesets",
+                        return_value=(complete, '"b"')) as fetch_changesets:
+            result, message = whatdidyoudo.app.get_changeset_summaries(
+                url, cache_result=True)
+        self.assertEqual(result, complete)
+        self.assertEqual(message, '')
+        fetch_changesets.assert_called_once_with(url, etag='"a"')
+
+        # Now the cached list is final
+        with mock.patch("whatdidyoudo.app.fetch_changesets") as fetch:
+            result, _ = whatdidyoudo.app.get_changeset_summaries(
+                url, cache_result=True)
+        self.assertEqual(result, complete)
+        fetch.assert_not_called()
+
+    def test_changes_stale_changeset_list(self) -> None:
+        """Test that lists cached before the range was over aren't final."""
+        day = "2026-01-02"
+        cs = Changeset(id="1", editor="iD", closed=True,
+                       created_at="2026-01-02T10:00:00Z")
+        url = whatdidyoudo.app.build_url(whatdidyoudo.app._changesets_url, {
+            "display_name": "rompe",
+            "time": f"{day}T00:00:00Z,{day}T23:59:00Z"})
+        # The list was stored while the day was still in progress
+        whatdidyoudo.app.cache.set(url, whatdidyoudo.app.cache_entry(
+            [cs], etag='"a"'))
+
+        # The OSM API can't be reached to revalidate it
+        with (mock.patch("whatdidyoudo.app.fetch_changesets",
+                         side_effect=requests.ConnectionError),
+              mock.patch("whatdidyoudo.app.fetch_diff",
+                         return_value=(5, None))):
+            changes, _, message = whatdidyoudo.app.get_changes(
+                "rompe", day, day)
+        self.assertEqual(changes["iD"].changes, 5)
+        self.assertIn("incomplete", message)
+        self.assertFalse(whatdidyoudo.app.cache.has(
+            whatdidyoudo.app.changes_cache_key(
+                "rompe", f"{day}T00:00", f"{day}T23:59")))
+
+    def test_changes_missing_diff(self) -> None:
+        """Test that changes are reported as incomplete without a diff."""
+        day = "2026-01-03"
+        cs = Changeset(id="9", editor="iD", closed=True,
+                       created_at="2026-01-03T10:00:00Z")
+        with (mock.patch("whatdidyoudo.app.fetch_changesets",
+                         return_value=([cs], None)),
+              mock.patch("whatdidyoudo.app.fetch_diff", return_value=None)):
+            changes, _, message = whatdidyoudo.app.get_changes(
+                "rompe", day, day)
+        self.assertEqual(changes["iD"].changesets, 1)
+        self.assertIn("couldn't be counted", message)
+
+    def test_get_changesets_partitions(self) -> None:
+        """Test that saturated ranges are split into partitions."""
+        # One changeset every 5 minutes, more than fit on one page
+        all_changesets = [Changeset(
+            id=str(number), editor="iD", closed=True,
+            created_at=f"2026-01-02T{number // 12:02}:"
+                       f"{number % 12 * 5:02}:00Z") for number in range(288)]
+
+        def get_changeset_page(user: str, start_date: str,
+                               end_date: str) -> tuple[list[Changeset], str]:
+            changesets = sorted(
+                (cs for cs in all_changesets
+                 if start_date <= cs.created_at[:16] <= end_date),
+                key=lambda cs: cs.created_at, reverse=True)
+            message = "Note: test" if start_date == "2026-01-02T00:00" else ""
+            return (changesets[:whatdidyoudo.app.max_changesets_osm],
+                    message)
+
+        with mock.patch("whatdidyoudo.app.get_changeset_page",
+                        side_effect=get_changeset_page) as page:
+            changesets, message = whatdidyoudo.app.get_changesets(
+                "rompe", "2026-01-02T00:00", "2026-01-02T23:59")
+        self.assertEqual(changesets, all_changesets[::-1])
+        self.assertEqual(message, "Note: test")
+        self.assertEqual(page.call_count,
+                         1 + whatdidyoudo.app.changeset_partitions)
+
+        # A full page within the first minute leaves no range to split
+        all_changesets = [cs._replace(created_at="2026-01-02T00:00:00Z")
+                          for cs in all_changesets[:100]]
+        with mock.patch("whatdidyoudo.app.get_changeset_page",
+                        side_effect=get_changeset_page):
+            changesets, _ = whatdidyoudo.app.get_changesets(
+                "rompe", "2026-01-02T00:00", "2026-01-02T23:59")
+        self.assertEqual(sorted(cs.id for cs in changesets),
+                         sorted(cs.id for cs in all_changesets))
+
+    def test_prefetch_neighbour_days(self) -> None:
+        """Test that only neighbouring days that are over are prefetched."""
+        today = datetime.date.fromisoformat(whatdidyoudo.app.get_today())
+        yesterday = today - datetime.timedelta(days=1)
+        with mock.patch.object(whatdidyoudo.app.prefetch_executor,
+                               "submit") as submit:
+            whatdidyoudo.app.prefetch_neighbour_days(["rompe"], yesterday)
+        # prefetch_day didn't run to release its slot
+        whatdidyoudo.app._prefetch_slots.release()
+        submit.assert_called_once_with(whatdidyoudo.app.prefetch_day, "rompe",
+                                       yesterday - datetime.timedelta(days=1))
+
+    def test_count_changes_stale_fallback(self) -> None:
+        """Test that a failed download falls back to the cached count."""
+        open_cs = Changeset(id="8", editor="iD", closed=False,
+                            created_at="2026-01-02T10:00:00Z")
+        with mock.patch("whatdidyoudo.app.fetch_diff",
+                        return_value=(3, None)):
+            whatdidyoudo.app.count_changes([open_cs])
+        with mock.patch("whatdidyoudo.app.fetch_diff", return_value=None):
+            changes, _, complete = whatdidyoudo.app.count_changes([open_cs])
+        self.assertEqual(changes["iD"].changes, 3)
+        self.assertFalse(complete)
@@ -1,14 +1,22 @@
 """A Flask app that shows OSM tasks done by a user on a specific day."""
 import datetime
+import functools
 import logging
+import os
 import pathlib
+import re
+import threading
+import time
 import xml.etree.ElementTree as ET
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Mapping, MutableMapping
+from typing import Any, Callable, Iterable, Iterator, Mapping, NamedTuple, TypeVar
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
-from flask import Flask, g, render_template, request
+from flask import Flask, g, render_template, request, stream_template
 from flask_caching import Cache
 from flask_limiter import Limiter, RateLimitExceeded
 from flask_limiter.util import get_remote_address
@@ -16,22 +24,109 @@ from flask_limiter.util import get_remote_address
 from whatdidyoudo import __version__
 
 max_changesets_osm = 100  # OSM API limit
+max_changeset_requests = 200  # Changeset list requests per user and range
+changeset_partitions = 8  # Parallel parts of a range with too many changesets
 static_dir = '/var/www/whatdidyoudo'  # Where your impressum.html snippet is
 cache_timeout = 60 * 60 * 24 * 7  # 7 days
+cache_redis_url = os.environ.get("WHATDIDYOUDO_CACHE_REDIS_URL")
+max_workers = 16  # Parallel changeset diff downloads
+max_connections = 16  # Concurrent OSM API requests of all users together
+osm_requests_per_second = 10  # Sustained OSM API request rate of all users
+max_prefetches = 8  # Queued background fetches of neighbouring days
 app = Flask(__name__)
-cache = Cache(app, config={"CACHE_TYPE": "SimpleCache",
+cache_dir = os.environ.get("WHATDIDYOUDO_CACHE_DIR",
+                           os.path.join(app.instance_path, "cache"))
+# Persist the cache across restarts and share it between worker processes,
+# use Redis to share it between hosts as well
+if cache_redis_url:
+    cache_config = {"CACHE_TYPE": "RedisCache",
+                    "CACHE_REDIS_URL": cache_redis_url,
+                    "CACHE_KEY_PREFIX": "whatdidyoudo_"}
+else:
+    # FileSystemCache unpickles whatever it finds, so the directory must be
+    # private to us
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    cache_dir_stat = os.stat(cache_dir)
+    if (cache_dir_stat.st_uid != os.geteuid()
+            or cache_dir_stat.st_mode & 0o022):
+        raise RuntimeError(f"Cache directory {cache_dir} must be owned by "
+                           "the current user and not writable by others.")
+    cache_config = {"CACHE_TYPE": "FileSystemCache",
+                    "CACHE_DIR": cache_dir,
+                    "CACHE_THRESHOLD": 100000}
+cache = Cache(app, config={**cache_config,
                            "CACHE_DEFAULT_TIMEOUT": cache_timeout})
-limiter = Limiter(app=app, key_func=get_remote_address)
+# Use e.g. redis://localhost:6379 to share rate limits between workers
+limiter = Limiter(app=app, key_func=get_remote_address,
+                  storage_uri=os.environ.get("WHATDIDYOUDO_LIMITER_STORAGE_URI",
+                                             "memory://"),
+                  strategy="moving-window")
 logger = logging.getLogger(__name__)
-
-
-@dataclass
+_static_pages_cache: tuple[str, float, list[str]] = ("", 0.0, [])
+_changesets_url = "https://api.openstreetmap.org/api/0.6/changesets"
+_diff_url = "https://api.openstreetmap.org/api/0.6/changeset/{}/download".format
+_element_start = re.compile(rb"<(?:node|way|relation)\b")
+_inflight: dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+_osm_slots = threading.BoundedSemaphore(max_connections)
+_prefetch_slots = threading.BoundedSemaphore(max_prefetches)
+prefetch_executor = ThreadPoolExecutor(max_workers=2)
+session = requests.Session()
+session.headers["User-Agent"] = (f"whatdidyoudo/{__version__} "
+                                 "(https://whatdidyoudo.rompe.org)")
+session.headers["Accept-Encoding"] = "gzip, deflate"
+# All requests go to the OSM API, keep one connection per concurrent request
+session.mount("https://", HTTPAdapter(
+    pool_connections=1, pool_maxsize=max_connections,
+    max_retries=Retry(total=3, backoff_factor=0.3,
+                      status_forcelist=[429, 502, 503, 504])))
+
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
 class Changes:
     """Represent changes made by a user."""
     changes: int = 0
     changesets: int = 0
 
 
+class Changeset(NamedTuple):
+    """Represent the parts of a changeset we are interested in."""
+    id: str
+    editor: str
+    closed: bool
+    created_at: str
+
+
+class TokenBucket:
+    """Limit the rate of outgoing requests while allowing short bursts."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take a token, waiting until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.burst), self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token now, even if it's only available later
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+osm_bucket = TokenBucket(rate=osm_requests_per_second, burst=max_connections)
+
+
 def debug(msg: str) -> None:
     """Log a message and store it in the Flask g object."""
     logger.debug(msg)
@@ -44,113 +139,469 @@ def debug(msg: str) -> None:
         logger.debug("No Flask g object available.")
 
 
+def cache_entry(body: Any, etag: str | None = None,
+                final: bool = False) -> dict[str, Any]:
+    """
+    Wrap a value for the cache together with the time it was fetched.
+
+    "etag" is the ETag header of the response the value was taken from.
+    "final" tells whether the value can't change any more, only final
+    entries may be used without asking the OSM API.
+    """
+    return {"ts": time.time(), "body": body, "etag": etag, "final": final}
+
+
+def stale_age(entry: Mapping[str, Any]) -> str:
+    """Return a human readable age of a cache entry."""
+    return str(datetime.timedelta(seconds=int(time.time() - entry["ts"])))
+
+
 def get_static_pages() -> list[str]:
-    """Return a list of available static pages."""
-    return [entry.stem for entry in pathlib.Path(static_dir).glob('*.html')]
+    """
+    Return a list of available static pages.
 
+    The list is only rebuilt when the directory's modification time changes.
+    """
+    global _static_pages_cache
+    try:
+        mtime = pathlib.Path(static_dir).stat().st_mtime
+    except OSError:
+        return []
+    if _static_pages_cache[:2] != (static_dir, mtime):
+        pages = [entry.stem for entry in pathlib.Path(static_dir).glob('*.html')]
+        _static_pages_cache = (static_dir, mtime, pages)
+    return _static_pages_cache[2]
 
-def get_etree_from_url(url: str, cache_result: bool = False) -> ET.Element:
-    """Fetches XML content from a URL and returns the root Element."""
-    result = cache.get(url)  # type: ignore
-    if result:
-        debug(f"Cache hit for URL: {url}")
+
+def coalesce(key: str, func: Callable[[], T]) -> T:
+    """
+    Return func(), but call it only once for concurrent callers with a key.
+
+    Callers arriving while another thread computes the same key wait for
+    that result instead of repeating the work.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        return future.result()
+    try:
+        result = func()
+    except BaseException as err:
+        future.set_exception(err)
+        raise
     else:
-        debug(f"Cache miss for URL: {url}")
-        response = requests.get(url, timeout=120, headers={"User-Agent": f"whatdidyoudo/{__version__} (https://whatdidyoudo.rompe.org)"})
-        response.raise_for_status()  # Raise an error for bad responses
-        result = response.content
-        if cache_result:
-            cache.set(url, result)  # type: ignore
-        else:
-            debug(f"Not caching result for URL: {url}")
-    return ET.fromstring(result)
+        future.set_result(result)
+        return result
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def build_url(url: str, params: Mapping[str, str]) -> str:
+    """
+    Return the encoded URL that requests would use for the given params.
+
+    This gives a canonical URL that also serves as the cache key.
+    """
+    return requests.Request("GET", url, params=params).prepare().url or url
+
+
+def get_response(url: str, session: requests.Session = session,
+                 stream: bool = False,
+                 etag: str | None = None) -> requests.Response:
+    """
+    Request a URL without touching the cache and return the response.
+
+    If "etag" is given, the request is conditional and the status code is
+    304 if the resource didn't change.
+    """
+    headers = {"If-None-Match": etag} if etag else {}
+    osm_bucket.acquire()
+    response = session.get(url, timeout=120, stream=stream, headers=headers)
+    response.raise_for_status()  # Raise an error for bad responses
+    return response
+
+
+def count_diff_changes(chunks: Iterable[bytes]) -> int:
+    """
+    Return the number of changed elements in a changeset diff.
+
+    Instead of parsing the XML, the opening node, way and relation tags are
+    counted in the raw chunks as they arrive. Only the bytes after the last
+    "<" of a chunk are carried over, as they may start a split tag.
+    """
+    total = 0
+    carry = b""
+    for chunk in chunks:
+        data = carry + chunk
+        cut = data.rfind(b"<")
+        if cut < 0:
+            carry = b""
+            continue
+        total += len(_element_start.findall(data, 0, cut))
+        carry = data[cut:]
+    return total + len(_element_start.findall(carry))
+
+
+def fetch_diff(url: str,
+               etag: str | None = None) -> tuple[int | None, str | None] | None:
+    """
+    Fetch and count a changeset diff, return (count, etag).
+
+    Return None if the diff is not available. "count" is None if "etag" was
+    given and the diff didn't change since.
+    This runs in worker threads, so it must not use the cache or Flask's g.
+    The diff is counted while it is downloaded instead of being buffered.
+    """
+    def download() -> tuple[int | None, str | None]:
+        with _osm_slots, get_response(url, stream=True,
+                                      etag=etag) as response:
+            if response.status_code == 304:
+                return None, etag
+            return (count_diff_changes(response.iter_content(chunk_size=65536)),
+                    response.headers.get("ETag"))
+
+    try:
+        return coalesce(f"{url} {etag}", download)
+    except requests.RequestException:
+        return None
+
+
+def _editor_of(cs: ET.Element) -> str:
+    """Return the created_by tag of a changeset element."""
+    for tag in cs:
+        if tag.tag == "tag" and tag.get("k") == "created_by":
+            return tag.get("v", "")
+    return ""
+
+
+def parse_changesets(chunks: Iterable[bytes]) -> list[Changeset]:
+    """
+    Return the changesets contained in a changeset list document.
 
+    The document is parsed chunk by chunk as it arrives, and every changeset
+    element is discarded once it has been summarized.
+    """
+    changesets: list[Changeset] = []
+    parser = ET.XMLPullParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, cs in parser.read_events():
+            if cs.tag != "changeset":
+                continue
+            cs_id, created_at = cs.get("id"), cs.get("created_at")
+            if cs_id is None or created_at is None:
+                logger.warning("Skipping malformed changeset element %s",
+                               cs.attrib)
+            else:
+                changesets.append(Changeset(
+                    id=cs_id, editor=_editor_of(cs),
+                    closed=cs.get("closed_at") is not None,
+                    created_at=created_at))
+            cs.clear()
+    parser.close()
+    return changesets
+
+
+def fetch_changesets(
+        url: str,
+        etag: str | None = None) -> tuple[list[Changeset] | None, str | None]:
+    """
+    Fetch and parse a changeset list without touching the cache.
+
+    Return (changesets, etag). "changesets" is None if "etag" was given and
+    the list didn't change since.
+    """
+    with _osm_slots, get_response(url, stream=True, etag=etag) as response:
+        if response.status_code == 304:
+            return None, etag
+        return (parse_changesets(response.iter_content(chunk_size=65536)),
+                response.headers.get("ETag"))
 
-def get_changesets(user: str, start_date: str, end_date: str,
-                   recursion: int = 0) -> tuple[list[ET.Element], str]:
+
+def get_changeset_summaries(
+        url: str, cache_result: bool = False,
+        stale_ok: bool = True) -> tuple[list[Changeset], str]:
+    """
+    Return ([changesets], message) for the changesets listed at a URL.
+
+    Only the extracted summaries are cached, not the XML document.
+    "cache_result" marks the result as final. Other cached results, including
+    ones stored before the range was over, are revalidated with their ETag,
+    and only used as a fallback when the OSM API can't be reached if
+    "stale_ok" is True. "message" tells that such a fallback was used, as the
+    list may be incomplete.
+    """
+    entry = cache.get(url)  # type: ignore
+    if entry is not None and entry.get("final"):
+        debug(f"Cache hit for URL: {url}")
+        return entry["body"], ''
+    debug(f"Cache miss for URL: {url}")
+    etag = entry.get("etag") if entry is not None else None
+    try:
+        result, etag = coalesce(f"{url} {etag}",
+                                lambda: fetch_changesets(url, etag=etag))
+    except requests.RequestException as err:
+        if entry is None or not stale_ok:
+            raise
+        logger.warning("Using stale result for %s: %s", url, err)
+        debug(f"Using result from {stale_age(entry)} ago for URL: {url}")
+        return entry["body"], ("Note: The OSM API can't be reached, showing "
+                               f"changesets from {stale_age(entry)} ago; "
+                               "results may be incomplete.")
+    if result is None:
+        debug(f"Cached result is still valid for URL: {url}")
+        result = entry["body"]  # type: ignore
+    cache.set(url, cache_entry(result, etag=etag,  # type: ignore
+                               final=cache_result))
+    return result, ''
+
+
+def get_changeset_page(user: str, start_date: str,
+                       end_date: str) -> tuple[list[Changeset], str]:
     """
     Return ([changesets], message) for a date/time range.
 
     start_date, end_date are ISO date strings (YYYY-MM-DDThh:mm).
-    This function recurses if the OSM API limit is reached.
+    The OSM API returns up to max_changesets_osm of the most recently created
+    changesets.
     """
-    message = ''
-    end_timestamp = datetime.datetime.strptime(end_date, "%Y-%m-%dT%H:%M")
-
-    # Build ISO datetime strings expected by the OSM API
-    # e.g. 2025-10-24T00:00:00Z
-    changeset_url = ("https://api.openstreetmap.org/api/0.6/changesets?"
-                     f"display_name={user}&"
-                     f"time={start_date}:00Z,"
-                     f"{end_date}:00Z")
+    end_timestamp = datetime.datetime.fromisoformat(end_date)
+
+    # The OSM API expects ISO datetime strings, e.g. 2025-10-24T00:00:00Z
+    changeset_url = build_url(_changesets_url, {
+        "display_name": user, "time": f"{start_date}:00Z,{end_date}:00Z"})
     debug(f"Fetching changesets from URL: {changeset_url}")
     # Don't cache result if today is included in the range
     cache_result = end_timestamp <= datetime.datetime.now()
-    root = get_etree_from_url(url=changeset_url, cache_result=cache_result)
-    changesets = root.findall("changeset")
-    if len(changesets) >= max_changesets_osm:
-        if recursion >= 50:
-            message = ("Note: Maximum recursion depth reached; "
-                       "results may be incomplete.")
-        else:
-            # OSM API limit reached, set end_date to last changeset's
-            # created_at minus one second and repeat
-            created_at = changesets[-1].attrib["created_at"]
-            created_timestamp = datetime.datetime.strptime(
-                created_at, "%Y-%m-%dT%H:%M:%SZ")
-            new_end = created_timestamp - datetime.timedelta(seconds=1)
-            new_end_date = new_end.strftime("%Y-%m-%dT%H:%M")
-            new_changesets, message = get_changesets(user=user,
-                                                     start_date=start_date,
-                                                     end_date=new_end_date,
-                                                     recursion=recursion + 1)
-            changesets += new_changesets
-    return changesets, message
+    return get_changeset_summaries(url=changeset_url,
+                                   cache_result=cache_result,
+                                   stale_ok=cache_result)
 
 
-def get_changes(user: str, start_date: str,
-                end_date: str) -> tuple[dict[str, Changes], list[str], str]:
+def get_older_end_date(changesets: list[Changeset]) -> str:
+    """Return the end date for the changesets older than a full page."""
+    # Use the last changeset's created_at minus one second
+    created_timestamp = datetime.datetime.fromisoformat(
+        changesets[-1].created_at.rstrip("Z"))
+    new_end = created_timestamp - datetime.timedelta(seconds=1)
+    return new_end.isoformat(timespec="minutes")
+
+
+def get_changesets_paged(user: str, start_date: str,
+                         end_date: str) -> tuple[list[Changeset], str]:
     """
-    Return ({app: Changes}, [changeset_ids], message) for a date/time range.
+    Return ([changesets], message) for a date/time range, one page at a time.
 
     start_date, end_date are ISO date strings (YYYY-MM-DDThh:mm).
+    If the OSM API limit is reached, this function keeps requesting older
+    changesets until the range is exhausted.
     """
-    # Ensure end_date defaults to start_date when not provided
-    end_date = end_date or start_date
-    if 'T' not in start_date:
-        start_date += 'T00:00'
-    if 'T' not in end_date:
-        start_date += 'T23:59'
+    message = ''
+    all_changesets: list[Changeset] = []
+    for _ in range(max_changeset_requests):
+        changesets, page_message = get_changeset_page(
+            user=user, start_date=start_date, end_date=end_date)
+        message = message or page_message
+        all_changesets.extend(changesets)
+        if len(changesets) < max_changesets_osm:
+            break
+        end_date = get_older_end_date(changesets)
+    else:
+        message = message or ("Note: Maximum number of OSM API requests "
+                              "reached; results may be incomplete.")
+    return all_changesets, message
 
-    changesets, message = get_changesets(user=user, start_date=start_date,
-                                         end_date=end_date)
 
+def get_changesets(user: str, start_date: str,
+                   end_date: str) -> tuple[list[Changeset], str]:
+    """
+    Return ([changesets], message) for a date/time range.
+
+    start_date, end_date are ISO date strings (YYYY-MM-DDThh:mm).
+    If the OSM API limit is reached, the rest of the range is split into
+    changeset_partitions parts which are paged through in parallel.
+    """
+    changesets, message = get_changeset_page(
+        user=user, start_date=start_date, end_date=end_date)
+    if len(changesets) < max_changesets_osm:
+        return changesets, message
+
+    start = datetime.datetime.fromisoformat(start_date)
+    end = datetime.datetime.fromisoformat(get_older_end_date(changesets))
+    minutes = max(int((end - start).total_seconds()) // 60, 0)
+    step = max(-(-minutes // changeset_partitions), 1)  # round up
+    ranges = [((start + datetime.timedelta(minutes=offset)).isoformat(
+                   timespec="minutes"),
+               (start + datetime.timedelta(
+                   minutes=min(offset + step, minutes))).isoformat(
+                   timespec="minutes"))
+              for offset in range(0, minutes or 1, step)]
+    debug(f"Fetching changesets of {user} in {len(ranges)} parts")
+
+    # Adjacent parts share their boundary minute, deduplicate by id
+    by_id = {cs.id: cs for cs in changesets}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda r: get_changesets_paged(user, *r),
+                               ranges)
+        for part, part_message in results:
+            by_id.update((cs.id, cs) for cs in part)
+            message = message or part_message
+    return sorted(by_id.values(), key=lambda cs: cs.created_at,
+                  reverse=True), message
+
+
+def count_changes(
+        changesets: list[Changeset]) -> tuple[dict[str, Changes], list[str],
+                                              bool]:
+    """
+    Return ({app: Changes}, [changeset_ids], complete) for changesets.
+
+    "complete" is False if a diff couldn't be fetched or was outdated.
+    """
+    if not changesets:
+        return {}, [], True
+    complete = True
     changes: defaultdict[str, Changes] = defaultdict(Changes)
     changeset_ids: list[str] = []
+    # The cache is only used from this thread, workers just download
+    misses: list[tuple[Changeset, dict[str, Any] | None, str]] = []
     for cs in changesets:
-        cs_id = cs.attrib["id"]
-        changeset_ids.append(cs_id)
+        changeset_ids.append(cs.id)
+        changes[cs.editor].changesets += 1
+
+        # Diffs stored while their changeset was still open are only
+        # revalidated or used as a fallback for when the OSM API is
+        # unavailable, even if the changeset is closed by now
+        entry = cache.get(f"diff_count:{cs.id}")  # type: ignore
+        if entry is not None and entry.get("final"):
+            debug(f"Cache hit for changeset diff {cs.id}")
+            changes[cs.editor].changes += entry["body"]
+            continue
 
-        # Don't cache changesets that are still open
-        cache_result = "closed_at" in cs.attrib
+        diff_url = _diff_url(cs.id)
+        debug(msg=f"Fetching changeset diff from {diff_url}")
+        misses.append((cs, entry, diff_url))
+
+    if misses:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                fetch_diff, [diff_url for *_, diff_url in misses],
+                [entry and entry.get("etag") for _, entry, _ in misses])
+            for (cs, entry, diff_url), result in zip(misses, results):
+                if result is None:
+                    complete = False
+                    if entry is None:
+                        debug(f"Can't fetch changeset diff from {diff_url}")
+                        continue
+                    debug(f"Using changeset diff from {stale_age(entry)} "
+                          f"ago for {diff_url}")
+                    count = entry["body"]
+                else:
+                    count, etag = result
+                    if count is None:
+                        debug(f"Cached changeset diff is still valid for "
+                              f"{diff_url}")
+                        count = entry["body"]  # type: ignore
+                    # Closed changesets never change, keep them forever
+                    cache.set(f"diff_count:{cs.id}",  # type: ignore
+                              cache_entry(count, etag=etag, final=cs.closed),
+                              timeout=0 if cs.closed else None)
+                changes[cs.editor].changes += count
+
+    return dict(changes), changeset_ids, complete
+
+
+def changes_cache_key(user: str, start_date: str, end_date: str) -> str:
+    """Return the cache key of the final changes of a user in a range."""
+    return f"changes_{user}_{start_date}_{end_date}"
+
+
+@functools.lru_cache(maxsize=1)
+def _today_for_minute(minute: int) -> str:
+    """Return today's date, "minute" is only used as the cache key."""
+    return datetime.date.today().isoformat()
+
+
+def get_today() -> str:
+    """Return today's ISO date, computed at most once per minute."""
+    return _today_for_minute(int(time.time() // 60))
+
+
+@functools.lru_cache(maxsize=1024)
+def split_users(user: str | None) -> tuple[str, ...]:
+    """Return the unique user names from a comma separated string."""
+    return tuple(dict.fromkeys(item.strip() for item in (user or "").split(",")
+                               if item.strip()))
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_range(start: str | None, end: str | None,
+                    today: str) -> tuple[str, str, bool]:
+    """
+    Return (start, end, expert) as ISO date strings (YYYY-MM-DDThh:mm).
 
-        tags = {tag.attrib["k"]: tag.attrib["v"]
-                for tag in cs.findall("tag")}
-        editor = tags.get("created_by", "")
-        changes[editor].changesets += 1
+    "start" defaults to "today", "end" defaults to "start", and dates
+    without a time span the whole day. "expert" is True if "end" was given.
+    Unpadded dates like 2026-1-5 are accepted and returned zero-padded.
+    Raise ValueError if a date is invalid.
+    """
+    expert = bool(end)
+    start = start or today
+    end = end or start
+    if 'T' not in start:
+        start += 'T00:00'
+    if 'T' not in end:
+        end += 'T23:59'
+    start, end = (datetime.datetime.strptime(value, "%Y-%m-%dT%H:%M")
+                  .isoformat(timespec="minutes") for value in (start, end))
+    return start, end, expert
 
-        diff_url = ("https://api.openstreetmap.org/api/0.6/changeset/"
-                    f"{cs_id}/download")
-        debug(msg=f"Fetching changeset diff from {diff_url} "
-              f"with{'out' if not cache_result else ''} caching")
-        try:
-            root = get_etree_from_url(url=diff_url, cache_result=cache_result)
-            for action in root:
-                changes[editor].changes += len(action)
-        except requests.HTTPError:
-            continue
 
-    return changes, changeset_ids, message
+def get_changes(user: str, start_date: str,
+                end_date: str) -> tuple[dict[str, Changes], list[str], str]:
+    """
+    Return ({app: Changes}, [changeset_ids], message) for a date/time range.
+
+    start_date, end_date are ISO date strings (YYYY-MM-DDThh:mm).
+    Complete results for ranges that are over are cached as a whole, without
+    a timeout.
+    """
+    start_date, end_date, _ = normalize_range(start=start_date, end=end_date,
+                                              today=start_date)
+
+    cache_key = changes_cache_key(user, start_date, end_date)
+    entry = cache.get(cache_key)  # type: ignore
+    if entry is not None:
+        debug(f"Cache hit for changes of {user} between {start_date} "
+              f"and {end_date}")
+        return entry["body"]
+
+    def collect() -> tuple[dict[str, Changes], list[str], str]:
+        changesets, message = get_changesets(user=user, start_date=start_date,
+                                             end_date=end_date)
+        changes, changeset_ids, complete = count_changes(changesets)
+        if not complete:
+            message = message or ("Note: Some changesets couldn't be "
+                                  "counted; results may be incomplete.")
+        result = changes, changeset_ids, message
+
+        # Results for past ranges with only closed changesets can't change
+        # any more, so they are kept forever. Don't cache if today is
+        # included in the range or something is missing.
+        if (complete and not message and
+                all(cs.closed for cs in changesets) and
+                datetime.datetime.fromisoformat(end_date)
+                <= datetime.datetime.now()):
+            cache.set(cache_key, cache_entry(result),  # type: ignore
+                      timeout=0)
+        return result
+
+    # Concurrent requests for the same changes wait for the first one
+    return coalesce(cache_key, collect)
 
 
 def get_changes_for_all_users(
@@ -162,22 +613,57 @@ def get_changes_for_all_users(
 
     start_date, end_date are ISO date strings (YYYY-MM-DDThh:mm).
     """
-    changes: MutableMapping[str, Mapping[str, Changes]] = \
-        defaultdict(lambda: defaultdict(Changes))
-    changeset_ids: list[str] = []
+    changes: dict[str, Mapping[str, Changes]] = {}
+    # Users may share changesets, keep the first occurrence of every id
+    changeset_ids: dict[str, None] = {}
     errors: list[str] = []
-    for name in users:
+    for name in dict.fromkeys(users):
         try:
             user_changes, user_changesets, message = get_changes(
                 user=name, start_date=start_date, end_date=end_date)
-            changes[name] = user_changes  # type: ignore
-            changeset_ids.extend(user_changesets)
+            changes[name] = user_changes
+            changeset_ids.update(dict.fromkeys(user_changesets))
             if message:
                 errors.append(message)
-        except requests.HTTPError:
+        except requests.RequestException:
             errors.append(f"Can't determine changes for user {name} between "
                           f"{start_date} and {end_date}.")
-    return changes, changeset_ids, errors
+    return changes, list(changeset_ids), errors
+
+
+def prefetch_day(user: str, day: datetime.date) -> None:
+    """Fill the cache with the changes of a user on a day."""
+    start_date, end_date, _ = normalize_range(start=day.isoformat(), end=None,
+                                              today=day.isoformat())
+    try:
+        get_changes(user=user, start_date=start_date, end_date=end_date)
+    except requests.RequestException as err:
+        logger.debug("Prefetching %s on %s failed: %s", user, day, err)
+    finally:
+        _prefetch_slots.release()
+
+
+def prefetch_neighbour_days(users: list[str], day: datetime.date) -> None:
+    """
+    Fetch the changes of the days before and after a day in the background.
+
+    This makes browsing day by day fast. Only days that are over are fetched,
+    as only their results are cached. Days that are already cached are
+    skipped, and nothing is queued while max_prefetches fetches are pending.
+    """
+    today = datetime.date.fromisoformat(get_today())
+    for name in users:
+        for neighbour in (day - datetime.timedelta(days=1),
+                          day + datetime.timedelta(days=1)):
+            start_date, end_date, _ = normalize_range(
+                start=neighbour.isoformat(), end=None,
+                today=neighbour.isoformat())
+            if (neighbour >= today or
+                    cache.has(changes_cache_key(name, start_date, end_date))):
+                continue
+            if not _prefetch_slots.acquire(blocking=False):
+                return
+            prefetch_executor.submit(prefetch_day, name, neighbour)
 
 
 def get_team_result(changes: Mapping[str, Mapping[str, Changes]]) -> str:
@@ -222,7 +708,7 @@ def static_page(page: str) -> str:
 @app.route('/<user>/<start_date>')
 @app.route('/<user>/<start_date>/<end_date>')
 def whatdidyoudo(user: str | None = None, start_date: str | None = None,
-                 end_date: str | None = None) -> str:
+                 end_date: str | None = None) -> str | Iterator[str]:
     """
     Show OSM tasks done by a user within a date/time range.
 
@@ -233,22 +719,37 @@ def whatdidyoudo(user: str | None = None, start_date: str | None = None,
     """
     errors: list[str] = []
     message = ''
-    today = datetime.date.today().isoformat()
+    today = get_today()
     date_str = (f"between {start_date} and {end_date}"
                 if end_date else f"on {start_date or today}")
 
-    expert = bool(end_date)  # if end_date was given, expert mode is active
-    start_date = start_date or today
-    end_date = end_date or start_date
-    if 'T' not in start_date:
-        start_date += 'T00:00'
-    if 'T' not in end_date:
-        end_date += 'T23:59'
+    try:
+        start_date, end_date, expert = normalize_range(
+            start=start_date, end=end_date, today=today)
+    except ValueError:
+        errors.append(f"Invalid date {date_str}, expected YYYY-MM-DD or "
+                      "YYYY-MM-DDThh:mm.")
+        return render_template('result.html', user=user, start_date=None,
+                               end_date=None, expert=bool(end_date),
+                               changes={}, message=message, errors=errors,
+                               date_str=date_str, version=__version__,
+                               changeset_ids=[],
+                               static_pages=get_static_pages(),
+                               debug_messages=[])
+
+    show_debug = request.args.get("debug") == "1"
+    static_pages = get_static_pages()
+    page_key = (f"html_{__version__}_{user}_{start_date}_{end_date}_{expert}_"
+                f"{date_str}_{'|'.join(static_pages)}")
+    if not show_debug:
+        html = cache.get(page_key)  # type: ignore
+        if html is not None:
+            return html
 
     debug(f"getting changes for {user} between {start_date} and {end_date}")
 
     changeset_ids: list[str] = []
-    users = [item.strip() for item in (user or "").split(",") if item.strip()]
+    users = list(split_users(user))
     changes: Mapping[str, Mapping[str, Changes]] = {}
     try:
         with limiter.limit("10 per minute"):
@@ -258,13 +759,24 @@ def whatdidyoudo(user: str | None = None, start_date: str | None = None,
             message = get_team_result(changes=changes)
     except RateLimitExceeded as msg:
         errors.append(f"Rate limit exceeded while processing {user}: {msg}")
-
-    show_debug = request.args.get("debug") == "1"
-    return render_template('result.html', user=user, start_date=start_date,
-                           end_date=end_date, expert=expert,
-                           changes=changes, message=message,
-                           errors=errors, date_str=date_str,
-                           version=__version__, changeset_ids=changeset_ids,
-                           static_pages=get_static_pages(),
-                           debug_messages=g.get("debug_messages", [])
-                           if show_debug else [])
+    # start_date has been validated by normalize_range above
+    if not expert and not errors and users:
+        prefetch_neighbour_days(
+            users=users, day=datetime.date.fromisoformat(start_date[:10]))
+
+    context = {"user": user, "start_date": start_date, "end_date": end_date,
+               "expert": expert, "changes": changes, "message": message,
+               "errors": errors, "date_str": date_str,
+               "version": __version__, "changeset_ids": changeset_ids,
+               "static_pages": static_pages,
+               "debug_messages": g.get("debug_messages", [])
+               if show_debug else []}
+    # Pages showing only final results are rendered once and then reused
+    if (not show_debug and not errors and users and
+            all(cache.has(changes_cache_key(name, start_date, end_date))
+                for name in users)):
+        html = render_template('result.html', **context)
+        cache.set(page_key, html)  # type: ignore
+        return html
+    # Stream the page, it may list a lot of changes
+    return stream_template('result.html', **context)